@@ -11,20 +11,36 @@ Features:
 - Error handling
 
 Installation:
-pip install fastapi uvicorn sqlalchemy python-jose passlib[bcrypt] python-multipart
+pip install fastapi "uvicorn[standard]" sqlalchemy "pyjwt>=2" passlib[bcrypt] python-multipart cachetools msgspec
 
 Run:
-uvicorn main:app --reload --port 8000
+uvicorn backend_example:app --reload --port 8000
+
+Run (production, one worker per core; workers share the SQLite database):
+pip install gunicorn uvicorn-worker
+gunicorn backend_example:app -k uvicorn_worker.UvicornWorker -w $((2 * $(nproc) + 1)) --bind 0.0.0.0:8000
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime, timedelta
+from fastapi.responses import Response
+from pydantic import BaseModel, EmailStr, AfterValidator, WithJsonSchema
+from pydantic.networks import validate_email
+from typing import Optional, List, Dict, Tuple, Annotated, Callable, TypeVar
+from datetime import date, datetime, timedelta
 from passlib.context import CryptContext
+from cachetools import TTLCache
+from functools import lru_cache
+import asyncio
+import hashlib
+import os
+import secrets
+import sqlite3
+import threading
+import time
 import jwt
+import msgspec
 
 # ==================== Configuration ====================
 
@@ -35,9 +51,44 @@ SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Tokens only carry user_id, email and exp, so only the signature and exp are checked
+JWT_DECODE_OPTIONS = {
+    "verify_signature": True,
+    "verify_exp": True,
+    "verify_nbf": False,
+    "verify_iat": False,
+    "verify_aud": False,
+    "verify_iss": False,
+    "require": ["exp"],
+}
+
+# Decoded token payloads, keyed by sha256 of the token
+TOKEN_CACHE_SIZE = 10_000
+TOKEN_CACHE_TTL_SECONDS = 5
+
+# bcrypt cost factor for admin passwords, and how long login checks are remembered
+BCRYPT_ROUNDS = 10
+LOGIN_CACHE_SIZE = 1024
+LOGIN_CACHE_TTL_SECONDS = 60
+
+# SQLite database file, shared by all worker processes
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "visitors.db")
+
+# Bounds on admin list pagination, keeping offsets within SQLite's integer range
+MAX_PAGE_SIZE = 1000
+MAX_PAGE = 1_000_000
+
+# Server processes for `python backend_example.py` (one per core by default)
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", 2 * (os.cpu_count() or 1) + 1))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
 
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+# (email, sha256(password)) -> result of the bcrypt check
+_verify_cache = TTLCache(maxsize=LOGIN_CACHE_SIZE, ttl=LOGIN_CACHE_TTL_SECONDS)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -49,9 +100,20 @@ app.add_middleware(
 
 # ==================== Models ====================
 
+@lru_cache(maxsize=4096)
+def normalize_email(value: str) -> str:
+    """Validate and normalize an email address (memoized for returning visitors)"""
+    return validate_email(value)[1]
+
+CachedEmailStr = Annotated[
+    str,
+    AfterValidator(normalize_email),
+    WithJsonSchema({"type": "string", "format": "email"})
+]
+
 class VisitorCreate(BaseModel):
     name: str
-    email: EmailStr
+    email: CachedEmailStr
     phone: str
     company: Optional[str] = None
     purpose: str
@@ -68,6 +130,17 @@ class VisitorResponse(BaseModel):
     message: Optional[str]
     checkin_time: datetime
 
+class Visitor(msgspec.Struct, gc=False):
+    """Stored visitor record (validated on the way in by VisitorCreate)"""
+    id: int
+    name: str
+    email: str
+    phone: str
+    company: Optional[str]
+    purpose: str
+    message: Optional[str]
+    checkin_time: str
+
 class AdminLogin(BaseModel):
     email: EmailStr
     password: str
@@ -82,10 +155,55 @@ class DashboardStats(BaseModel):
     this_week_visitors: int
     this_month_visitors: int
 
-# ==================== In-Memory Database ====================
-# Replace with actual database in production (PostgreSQL, MySQL, etc.)
+# ==================== Database ====================
+# SQLite in WAL mode: a single file shared by every worker process, where
+# readers never block the writer. Swap for PostgreSQL/MySQL at larger scale.
+
+# Stored in PRAGMA user_version once the schema and seed data are in place
+SCHEMA_VERSION = 1
+
+VISITOR_COLUMNS = "id, name, email, phone, company, purpose, message, checkin_time"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS visitors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    company TEXT,
+    purpose TEXT NOT NULL,
+    message TEXT,
+    checkin_time TEXT NOT NULL,
+    -- Lowercased copies for case-insensitive search
+    name_lower TEXT NOT NULL,
+    email_lower TEXT NOT NULL,
+    company_lower TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_visitors_checkin ON visitors (checkin_time);
+CREATE INDEX IF NOT EXISTS idx_visitors_purpose ON visitors (purpose, checkin_time);
+"""
+
+INSERT_VISITOR_SQL = """
+INSERT INTO visitors (
+    id, name, email, phone, company, purpose, message, checkin_time,
+    name_lower, email_lower, company_lower
+) VALUES (
+    :id, :name, :email, :phone, :company, :purpose, :message, :checkin_time,
+    :name_lower, :email_lower, :company_lower
+)
+"""
 
-visitors_db = [
+# checkin_time is stored as an ISO string, so a YYYY-MM-DD date sorts right
+# before every checkin_time on that day and each count is an index range scan
+STATS_SQL = """
+SELECT
+    (SELECT COUNT(*) FROM visitors),
+    (SELECT COUNT(*) FROM visitors WHERE checkin_time >= ? AND checkin_time < ?),
+    (SELECT COUNT(*) FROM visitors WHERE checkin_time >= ?),
+    (SELECT COUNT(*) FROM visitors WHERE checkin_time >= ?)
+"""
+
+_seed_visitors = [
     {
         "id": 1,
         "name": "John Doe",
@@ -118,6 +236,114 @@ visitors_db = [
     }
 ]
 
+T = TypeVar("T")
+
+# Dashboard stats, cached per (day, PRAGMA data_version)
+_stats_cache: Dict[Tuple[str, int], dict] = {}
+
+def _insert_visitor(conn: sqlite3.Connection, data: dict) -> int:
+    """Insert a visitor with its lowercased search columns, returning its id"""
+    cursor = conn.execute(INSERT_VISITOR_SQL, {
+        **data,
+        "name_lower": data["name"].lower(),
+        "email_lower": data["email"].lower(),
+        "company_lower": (data["company"] or "").lower()
+    })
+    return cursor.lastrowid
+
+def _fetch_visitor(conn: sqlite3.Connection, visitor_id: int) -> Optional[Visitor]:
+    """Load a single visitor by id"""
+    row = conn.execute(f"SELECT {VISITOR_COLUMNS} FROM visitors WHERE id = ?", (visitor_id,)).fetchone()
+    return Visitor(*row) if row else None
+
+def _delete_visitor(conn: sqlite3.Connection, visitor_id: int) -> bool:
+    """Delete a visitor by id, returning whether it existed"""
+    return conn.execute("DELETE FROM visitors WHERE id = ?", (visitor_id,)).rowcount > 0
+
+def _count_visitors(conn: sqlite3.Connection, today: date) -> Tuple[int, int, int, int]:
+    """Count total, today's, this week's and this month's visitors"""
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    tomorrow = today + timedelta(days=1)
+    return conn.execute(
+        STATS_SQL,
+        (today.isoformat(), tomorrow.isoformat(), week_start.isoformat(), month_start.isoformat())
+    ).fetchone()
+
+def _initialize_db(conn: sqlite3.Connection):
+    """Create the schema, and seed demo data the first time the database is set up"""
+    conn.execute("PRAGMA journal_mode=WAL")  # Persistent, so set once per database file
+    conn.executescript(SCHEMA)
+    
+    # Seed demo data only when the database is first initialized, never
+    # again after visitors are deleted. The write lock keeps worker
+    # processes starting together from both seeding it.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            if conn.execute("SELECT 1 FROM visitors LIMIT 1").fetchone() is None:
+                for data in _seed_visitors:
+                    _insert_visitor(conn, data)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+class Database:
+    """
+    SQLite access for one process. Every statement runs in a worker thread
+    on that thread's own connection, so a writer waiting on the lock of a
+    busy WAL file never blocks the event loop or other requests.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._monitor: Optional[sqlite3.Connection] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            with self._init_lock:
+                if not self._initialized:
+                    _initialize_db(conn)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+    
+    def _data_version(self) -> int:
+        # data_version is only comparable on one connection, so all callers
+        # share a dedicated one; it changes whenever any other connection
+        # (in this or another process) commits
+        with self._init_lock:
+            if self._monitor is None:
+                self._monitor = sqlite3.connect(self.path, check_same_thread=False)
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+    
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Call func(connection, *args) in a worker thread"""
+        return await asyncio.to_thread(lambda: func(self.connection(), *args))
+    
+    async def data_version(self) -> int:
+        """Counter that changes whenever the visitors table may have changed"""
+        return await asyncio.to_thread(self._data_version)
+
+_database = Database(DATABASE_PATH)
+
+async def get_db() -> Database:
+    """Return this process's database"""
+    return _database
+
 admin_users = {
     "admin@demo.com": {
         "id": 1,
@@ -127,26 +353,105 @@ admin_users = {
     }
 }
 
+# Verified against on unknown emails so login timing doesn't reveal which admins exist
+_DUMMY_PASSWORD_HASH = pwd_context.hash(secrets.token_urlsafe(16))
+
 # ==================== Helper Functions ====================
 
+def msgspec_response(content, status_code: int = status.HTTP_200_OK) -> Response:
+    """Encode visitor records with msgspec and return them as JSON"""
+    return Response(
+        content=msgspec.json.encode(content),
+        status_code=status_code,
+        media_type="application/json"
+    )
+
 def create_access_token(data: dict):
     """Create JWT access token"""
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
+    expire = int(time.time()) + ACCESS_TOKEN_EXPIRE_HOURS * 3600
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify JWT token"""
+    key = hashlib.sha256(credentials.credentials.encode()).digest()
+    
+    # Reuse the decoded payload for recently verified tokens that haven't expired
+    payload = _token_cache.get(key)
+    if payload is not None and payload["exp"] > time.time():
+        return payload
+    
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(
+            credentials.credentials,
+            SECRET_KEY,
+            algorithms=[ALGORITHM],
+            options=JWT_DECODE_OPTIONS
+        )
+        _token_cache[key] = payload
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def query_visitors(
+    conn: sqlite3.Connection,
+    search: Optional[str],
+    purpose: Optional[str],
+    startDate: Optional[str],
+    endDate: Optional[str],
+    offset: int,
+    count: int
+) -> Tuple[List[Visitor], int]:
+    """
+    Run the admin list filters in SQLite, returning one page of visitors
+    (newest first) and the total number of matches
+    """
+    clauses = []
+    params = []
+    
+    # Search filter (against the lowercased columns; phone is matched as-is)
+    if search:
+        search_lower = search.lower()
+        clauses.append(
+            "(instr(name_lower, ?) > 0 OR instr(email_lower, ?) > 0 OR "
+            "instr(company_lower, ?) > 0 OR instr(phone, ?) > 0)"
+        )
+        params += [search_lower] * 4
+    
+    # Purpose filter
+    if purpose:
+        clauses.append("purpose = ?")
+        params.append(purpose)
+    
+    # Date range filters
+    if startDate:
+        clauses.append("checkin_time >= ?")
+        params.append(startDate)
+    
+    if endDate:
+        clauses.append("checkin_time <= ?")
+        params.append(endDate)
+    
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    
+    # One read transaction, so the total and the page see the same snapshot
+    conn.execute("BEGIN")
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM visitors{where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {VISITOR_COLUMNS} FROM visitors{where} "
+            "ORDER BY checkin_time DESC, id DESC LIMIT ? OFFSET ?",
+            [*params, count, offset]
+        ).fetchall()
+    finally:
+        conn.execute("COMMIT")
+    
+    return [Visitor(*row) for row in rows], total
+
 # ==================== Public Routes ====================
 
 @app.get("/")
@@ -155,23 +460,27 @@ async def root():
     return {"message": "Visitor Management API is running", "version": "1.0.0"}
 
 @app.post("/api/visitors", response_model=VisitorResponse, status_code=status.HTTP_201_CREATED)
-async def create_visitor(visitor: VisitorCreate):
+async def create_visitor(visitor: VisitorCreate, db: Database = Depends(get_db)):
     """
     Create a new visitor entry
     Public endpoint - no authentication required
     """
-    # Generate new ID
-    new_id = max([v["id"] for v in visitors_db], default=0) + 1
-    
     # Create visitor record
-    visitor_dict = visitor.dict()
-    visitor_dict["id"] = new_id
-    visitor_dict["checkin_time"] = visitor.checkin_time.isoformat()
+    visitor_data = {
+        "id": None,  # Assigned by the database
+        "name": visitor.name,
+        "email": visitor.email,
+        "phone": visitor.phone,
+        "company": visitor.company,
+        "purpose": visitor.purpose,
+        "message": visitor.message,
+        "checkin_time": visitor.checkin_time.isoformat()
+    }
     
     # Add to database
-    visitors_db.append(visitor_dict)
+    visitor_data["id"] = await db.run(_insert_visitor, visitor_data)
     
-    return visitor_dict
+    return msgspec_response(Visitor(**visitor_data), status_code=status.HTTP_201_CREATED)
 
 # ==================== Admin Routes ====================
 
@@ -181,17 +490,18 @@ async def admin_login(login: AdminLogin):
     Admin login endpoint
     Returns JWT token on successful authentication
     """
-    # Check if user exists
+    # Check if user exists (unknown emails still go through bcrypt)
     user = admin_users.get(login.email)
+    password_hash = user["password"] if user else _DUMMY_PASSWORD_HASH
     
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid credentials"
-        )
+    # Verify password (bcrypt runs off the event loop; recent results are reused)
+    cache_key = (login.email, hashlib.sha256(login.password.encode()).digest())
+    password_ok = _verify_cache.get(cache_key)
+    if password_ok is None:
+        password_ok = await asyncio.to_thread(pwd_context.verify, login.password, password_hash)
+        _verify_cache[cache_key] = password_ok
     
-    # Verify password
-    if not pwd_context.verify(login.password, user["password"]):
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -215,130 +525,108 @@ async def get_visitors(
     purpose: Optional[str] = None,
     startDate: Optional[str] = None,
     endDate: Optional[str] = None,
-    page: int = 1,
-    limit: int = 100,
-    payload: dict = Depends(verify_token)
+    page: int = Query(1, ge=1, le=MAX_PAGE),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    payload: dict = Depends(verify_token),
+    db: Database = Depends(get_db)
 ):
     """
     Get all visitors with optional filters
     Requires authentication
     """
-    filtered_visitors = visitors_db.copy()
-    
-    # Apply search filter
-    if search:
-        search_lower = search.lower()
-        filtered_visitors = [
-            v for v in filtered_visitors
-            if search_lower in v["name"].lower() or
-               search_lower in v["email"].lower() or
-               (v["company"] and search_lower in v["company"].lower()) or
-               search_lower in v["phone"]
-        ]
-    
-    # Apply purpose filter
-    if purpose:
-        filtered_visitors = [v for v in filtered_visitors if v["purpose"] == purpose]
-    
-    # Apply date range filters
-    if startDate:
-        filtered_visitors = [
-            v for v in filtered_visitors
-            if v["checkin_time"] >= startDate
-        ]
-    
-    if endDate:
-        filtered_visitors = [
-            v for v in filtered_visitors
-            if v["checkin_time"] <= endDate
-        ]
-    
-    # Sort by checkin_time (newest first)
-    filtered_visitors.sort(key=lambda x: x["checkin_time"], reverse=True)
-    
     # Pagination
-    start_idx = (page - 1) * limit
-    end_idx = start_idx + limit
-    paginated_visitors = filtered_visitors[start_idx:end_idx]
+    offset = (page - 1) * limit
     
-    return {
+    paginated_visitors, total = await db.run(
+        query_visitors, search, purpose, startDate, endDate, offset, limit
+    )
+    
+    return msgspec_response({
         "data": paginated_visitors,
-        "total": len(filtered_visitors),
+        "total": total,
         "page": page,
         "limit": limit,
-        "pages": (len(filtered_visitors) + limit - 1) // limit
-    }
-
-@app.get("/api/admin/visitors/{visitor_id}", response_model=VisitorResponse)
-async def get_visitor(visitor_id: int, payload: dict = Depends(verify_token)):
+        "pages": (total + limit - 1) // limit
+    })
+
+@app.get("/api/admin/visitors/{visitor_id}")
+async def get_visitor(
+    visitor_id: int,
+    payload: dict = Depends(verify_token),
+    db: Database = Depends(get_db)
+):
     """
     Get a specific visitor by ID
     Requires authentication
     """
-    visitor = next((v for v in visitors_db if v["id"] == visitor_id), None)
+    visitor = await db.run(_fetch_visitor, visitor_id)
     
     if not visitor:
         raise HTTPException(status_code=404, detail="Visitor not found")
     
-    return visitor
+    return msgspec_response(visitor)
 
 @app.delete("/api/admin/visitors/{visitor_id}")
-async def delete_visitor(visitor_id: int, payload: dict = Depends(verify_token)):
+async def delete_visitor(
+    visitor_id: int,
+    payload: dict = Depends(verify_token),
+    db: Database = Depends(get_db)
+):
     """
     Delete a visitor record
     Requires authentication
     """
-    global visitors_db
-    
-    # Find visitor
-    visitor = next((v for v in visitors_db if v["id"] == visitor_id), None)
+    # Remove from database
+    deleted = await db.run(_delete_visitor, visitor_id)
     
-    if not visitor:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Visitor not found")
     
-    # Remove from database
-    visitors_db = [v for v in visitors_db if v["id"] != visitor_id]
-    
     return {"message": "Visitor deleted successfully"}
 
 @app.get("/api/admin/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(payload: dict = Depends(verify_token)):
+async def get_dashboard_stats(
+    payload: dict = Depends(verify_token),
+    db: Database = Depends(get_db)
+):
     """
     Get dashboard statistics
     Requires authentication
     """
     now = datetime.now()
     today = now.date()
-    week_start = today - timedelta(days=today.weekday())
-    month_start = today.replace(day=1)
-    
-    # Calculate stats
-    total_visitors = len(visitors_db)
     
-    today_visitors = len([
-        v for v in visitors_db
-        if datetime.fromisoformat(v["checkin_time"]).date() == today
-    ])
+    # Stats only change when the day rolls over or visitors are added/removed;
+    # data_version moves on every commit, from this process or any other
+    data_version = await db.data_version()
+    cache_key = (today.isoformat(), data_version)
+    cached_stats = _stats_cache.get(cache_key)
+    if cached_stats is not None:
+        return cached_stats
     
-    this_week_visitors = len([
-        v for v in visitors_db
-        if datetime.fromisoformat(v["checkin_time"]).date() >= week_start
-    ])
+    # Calculate stats with index range counts
+    total_visitors, today_visitors, this_week_visitors, this_month_visitors = await db.run(
+        _count_visitors, today
+    )
     
-    this_month_visitors = len([
-        v for v in visitors_db
-        if datetime.fromisoformat(v["checkin_time"]).date() >= month_start
-    ])
-    
-    return {
+    stats = {
         "total_visitors": total_visitors,
         "today_visitors": today_visitors,
         "this_week_visitors": this_week_visitors,
         "this_month_visitors": this_month_visitors
     }
+    _stats_cache.clear()
+    _stats_cache[cache_key] = stats
+    
+    return stats
 
 # ==================== Run Server ====================
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "backend_example:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=WORKERS
+    )